@@ -0,0 +1,31 @@
+import click
+from frappe.commands import pass_context
+from frappe.exceptions import SiteNotSpecifiedError
+
+
+@click.command("rebuild-custody-summary")
+@pass_context
+def rebuild_custody_summary(context):
+    """Recompute custody balances and dashboard counters from submitted documents"""
+    import frappe
+
+    from custody.custody.doctype.custody_balance.custody_balance import rebuild_custody_balance
+    from custody.custody.doctype.custody_summary.custody_summary import (
+        rebuild_custody_summary as rebuild_summary,
+    )
+
+    for site in context.sites:
+        try:
+            frappe.init(site=site)
+            frappe.connect()
+            rebuild_custody_balance()
+            rebuild_summary()
+            frappe.db.commit()
+        finally:
+            frappe.destroy()
+
+    if not context.sites:
+        raise SiteNotSpecifiedError
+
+
+commands = [rebuild_custody_summary]
@@ -0,0 +1,90 @@
+# apps/custody/custody/custody/api/custody_dashboard
+
+import frappe
+from frappe.utils import cint, flt
+
+COUNTERS = ("assets_in_custody", "custody_value", "pending_drafts")
+
+
+def sum_counters(rows):
+    totals = frappe._dict({counter: 0 for counter in COUNTERS})
+    for row in rows:
+        totals.assets_in_custody += cint(row.assets_in_custody)
+        totals.custody_value += flt(row.custody_value)
+        totals.pending_drafts += cint(row.pending_drafts)
+    return totals
+
+
+@frappe.whitelist()
+def get_employee_custody_summary(employee, company=None):
+    """
+    Returns the precomputed custody counters of an employee, optionally for one company.
+    Reads the Custody Summary rows only, never the Custody Receipt Items.
+    """
+    frappe.has_permission("Employee", "read", employee, throw=True)
+
+    filters = {"employee": employee}
+    if company:
+        filters["company_name"] = company
+
+    return sum_counters(frappe.get_all("Custody Summary", filters=filters, fields=list(COUNTERS)))
+
+
+@frappe.whitelist()
+def get_company_custody_summary(company=None):
+    """Returns the precomputed custody counters of a company, or of all companies"""
+    filters = {"company_name": company} if company else {}
+    return sum_counters(frappe.get_list("Custody Summary", filters=filters, fields=list(COUNTERS)))
+
+
+@frappe.whitelist()
+def get_custody_heatmap(company=None, limit=100):
+    """Returns the employees holding the most assets, with their counters, for dashboard charts"""
+    filters = {"employee": ("is", "set")}
+    if company:
+        filters["company_name"] = company
+
+    return frappe.get_list(
+        "Custody Summary",
+        filters=filters,
+        fields=["employee", "employee_name", "company_name", *COUNTERS],
+        order_by="assets_in_custody desc, custody_value desc",
+        limit=cint(limit),
+    )
+
+
+def get_number_card(counter, filters=None):
+    filters = frappe.parse_json(filters) or {}
+    totals = get_company_custody_summary(filters.get("company") or filters.get("company_name"))
+    return {
+        "value": totals[counter],
+        "fieldtype": "Currency" if counter == "custody_value" else "Int",
+        "route": ["List", "Custody Summary"],
+    }
+
+
+@frappe.whitelist()
+def get_assets_in_custody_card(filters=None):
+    return get_number_card("assets_in_custody", filters)
+
+
+@frappe.whitelist()
+def get_custody_value_card(filters=None):
+    return get_number_card("custody_value", filters)
+
+
+@frappe.whitelist()
+def get_pending_drafts_card(filters=None):
+    return get_number_card("pending_drafts", filters)
+
+
+@frappe.whitelist()
+def get_asset_custody(asset):
+    """Returns the employees an asset is outstanding with, read from Custody Balance"""
+    frappe.has_permission("Asset", "read", asset, throw=True)
+
+    return frappe.get_all(
+        "Custody Balance",
+        filters={"asset": asset, "outstanding_qty": (">", 0)},
+        fields=["employee", "employee_name", "company_name", "outstanding_qty"],
+    )
@@ -2,7 +2,17 @@
 
 import frappe
 from frappe import _
-from frappe.utils import get_link_to_form
+from frappe.utils import flt, get_link_to_form
+
+from custody.custody.doctype.custody_balance.custody_balance import (
+    get_outstanding_map,
+    get_row_balance_name,
+)
+from custody.custody.doctype.custody_receipt.custody_receipt import (
+    GROUPED_PRINT_FORMAT,
+    PRINT_CACHE_EXPIRY,
+    get_print_cache_key,
+)
 
 @frappe.whitelist()
 def create_custody_receipt_from_pr(source_name):
@@ -247,6 +257,83 @@ def create_custody_receipt_from_pr(source_name):
     return cr.name
 
 
+@frappe.whitelist()
+def create_custody_return_from_receipt(source_name):
+    """
+    Creates a Custody Return from a submitted Custody Receipt.
+    Each row is capped at what it issued minus earlier returns against it, and at what is
+    still outstanding with the employee, so a receipt can be returned in several parts.
+    """
+    cr = frappe.get_doc("Custody Receipt", source_name)
+    cr.check_permission("read")
+    frappe.has_permission("Custody Return", "create", throw=True)
+    if cr.docstatus != 1:
+        frappe.throw(_("Custody Receipt {0} must be submitted").format(cr.name))
+
+    ret = frappe.new_doc("Custody Return")
+    ret.company_name = cr.company_name
+    ret.employee = cr.employee
+    ret.employee_name = cr.employee_name
+    ret.posting_date = frappe.utils.today()
+
+    outstanding = get_outstanding_map(cr.employee, cr.items)
+    for item in cr.items:
+        key = get_row_balance_name(cr.employee, item)
+        qty = min(flt(item.qty) - flt(item.returned_qty), flt(outstanding.get(key)))
+        if qty <= 0:
+            continue
+        outstanding[key] = flt(outstanding.get(key)) - qty
+
+        ret.append("items", {
+            "custody_receipt": cr.name,
+            "custody_receipt_item": item.name,
+            "item_code": item.item_code,
+            "item_name": item.item_name,
+            "asset": item.asset,
+            "purchase_receipt_item": item.purchase_receipt_item,
+            "qty": qty,
+            "uom": item.uom,
+            "rate": flt(item.rate),
+            "amount": flt(item.rate) * qty,
+        })
+
+    if not ret.get("items"):
+        frappe.throw(_("Nothing is outstanding against Custody Receipt {0}").format(cr.name))
+
+    ret.insert()
+
+    frappe.msgprint(
+        _("Successfully created Custody Return: {0}").format(
+            get_link_to_form("Custody Return", ret.name)
+        ),
+        title=_("Success"),
+        indicator="green"
+    )
+
+    return ret.name
+
+
+@frappe.whitelist()
+def download_grouped_custody_receipt_pdf(name):
+    """
+    Downloads a Custody Receipt as PDF using the grouped print format.
+    The PDF of a submitted receipt is rendered once per document version and then served from cache.
+    """
+    cr = frappe.get_doc("Custody Receipt", name)
+    cr.check_permission("print")
+
+    key = get_print_cache_key(cr)
+    pdf = frappe.cache().get_value(key) if cr.docstatus == 1 else None
+    if not pdf:
+        pdf = frappe.get_print("Custody Receipt", cr.name, GROUPED_PRINT_FORMAT, doc=cr, as_pdf=True)
+        if cr.docstatus == 1:
+            frappe.cache().set_value(key, pdf, expires_in_sec=PRINT_CACHE_EXPIRY)
+
+    frappe.local.response.filename = f"{cr.name}.pdf"
+    frappe.local.response.filecontent = pdf
+    frappe.local.response.type = "pdf"
+
+
 @frappe.whitelist()
 def create_custody_receipt_from_employee(employee_name, assets=None):
     """
@@ -0,0 +1,121 @@
+# Copyright (c) 2026, gadallah and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt
+
+from custody.utils import get_key_name, replace_all, upsert_counters
+
+BALANCE_FIELDS = [
+    "name", "employee", "employee_name", "company_name", "item_code", "asset",
+    "purchase_receipt_item", "issued_qty", "returned_qty", "outstanding_qty",
+]
+
+
+class CustodyBalance(Document):
+    pass
+
+
+def get_balance_name(employee, item_code, asset=None, purchase_receipt_item=None):
+    """Deterministic name of the balance row for an employee / item / asset / PR item key,
+    so outstanding lookups are a primary key read"""
+    return get_key_name(employee, item_code, asset, purchase_receipt_item)
+
+
+def get_row_balance_name(employee, row):
+    return get_balance_name(employee, row.get("item_code"), row.get("asset"), row.get("purchase_receipt_item"))
+
+
+def get_outstanding_qty(employee, item_code, asset=None, purchase_receipt_item=None):
+    """Returns the quantity still in custody of the employee for the given key"""
+    name = get_balance_name(employee, item_code, asset, purchase_receipt_item)
+    return flt(frappe.db.get_value("Custody Balance", name, "outstanding_qty"))
+
+
+def get_outstanding_map(employee, rows, for_update=False):
+    """
+    Returns {balance name: outstanding qty} for the keys of the given rows in one query.
+    With for_update the balance rows stay locked until the transaction ends.
+    """
+    names = list({get_row_balance_name(employee, row) for row in rows})
+    if not names:
+        return {}
+
+    return frappe._dict(frappe.db.sql(
+        f"""select name, outstanding_qty from `tabCustody Balance`
+        where name in %(names)s {"for update" if for_update else ""}""",
+        {"names": tuple(names)},
+    ))
+
+
+def update_custody_balance(doc, qty_field, factor=1):
+    """
+    Applies the rows of a Custody Receipt (qty_field="issued_qty") or Custody Return
+    (qty_field="returned_qty") to the running balances.
+    factor is 1 on submit and -1 on cancel. Rows sharing a key are summed first and then
+    upserted in batches, adding to existing balances and creating missing ones.
+    """
+    deltas = {}
+    for row in doc.get("items"):
+        qty = flt(row.qty) * factor
+        if not qty:
+            continue
+        name = get_row_balance_name(doc.employee, row)
+        if name not in deltas:
+            deltas[name] = frappe._dict(
+                item_code=row.item_code,
+                asset=row.get("asset"),
+                purchase_receipt_item=row.get("purchase_receipt_item"),
+                qty=0,
+            )
+        deltas[name].qty += qty
+
+    if not deltas:
+        return
+
+    sign = 1 if qty_field == "issued_qty" else -1
+    upsert_counters(
+        "Custody Balance",
+        BALANCE_FIELDS,
+        [
+            (
+                name, doc.employee, doc.get("employee_name"), doc.get("company_name"),
+                delta.item_code, delta.asset, delta.purchase_receipt_item,
+                delta.qty if qty_field == "issued_qty" else 0,
+                delta.qty if qty_field == "returned_qty" else 0,
+                sign * delta.qty,
+            )
+            for name, delta in sorted(deltas.items())
+        ],
+        ("issued_qty", "returned_qty", "outstanding_qty"),
+    )
+
+
+def rebuild_custody_balance():
+    """Recomputes all balances from submitted Custody Receipts and Custody Returns"""
+    balances = {}
+    for doctype, qty_field in (("Custody Receipt", "issued_qty"), ("Custody Return", "returned_qty")):
+        rows = frappe.db.sql(
+            f"""select p.employee, max(p.employee_name) as employee_name,
+                max(p.company_name) as company_name, i.item_code, i.asset,
+                i.purchase_receipt_item, sum(i.qty) as qty
+            from `tab{doctype} Item` i
+            inner join `tab{doctype}` p on p.name = i.parent
+            where p.docstatus = 1 and i.parenttype = %s
+            group by p.employee, i.item_code, i.asset, i.purchase_receipt_item""",
+            doctype,
+            as_dict=True,
+        )
+        for row in rows:
+            name = get_row_balance_name(row.employee, row)
+            balance = balances.setdefault(name, frappe._dict(row, issued_qty=0, returned_qty=0))
+            balance[qty_field] += flt(row.qty)
+
+    replace_all("Custody Balance", BALANCE_FIELDS, [
+        (
+            name, b.employee, b.employee_name, b.company_name, b.item_code, b.asset,
+            b.purchase_receipt_item, b.issued_qty, b.returned_qty, b.issued_qty - b.returned_qty,
+        )
+        for name, b in balances.items()
+    ])
@@ -0,0 +1,42 @@
+# Copyright (c) 2026, gadallah and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custody.custody.doctype.custody_balance.custody_balance import (
+	get_balance_name,
+	get_outstanding_qty,
+	rebuild_custody_balance,
+)
+from custody.custody.doctype.custody_receipt.test_custody_receipt import (
+	TEST_ITEM,
+	make_custody_receipt,
+	make_custody_test_data,
+)
+
+
+class TestCustodyBalance(FrappeTestCase):
+	def setUp(self):
+		self.employee, _other = make_custody_test_data()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_balance_name_is_stable_for_empty_keys(self):
+		self.assertEqual(get_balance_name("EMP-1", "ITEM-1"), get_balance_name("EMP-1", "ITEM-1", "", None))
+		self.assertNotEqual(get_balance_name("EMP-1", "ITEM-1"), get_balance_name("EMP-1", "ITEM-1", "AST-1"))
+
+	def test_receipt_submit_and_cancel(self):
+		# rows sharing a key are summed into one balance row
+		first = make_custody_receipt(
+			self.employee, items=[{"item_code": TEST_ITEM, "qty": 2}, {"item_code": TEST_ITEM, "qty": 3}]
+		)
+		make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1}])
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 6)
+
+		first.cancel()
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 1)
+
+		rebuild_custody_balance()
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 1)
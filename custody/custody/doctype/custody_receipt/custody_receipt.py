@@ -1,13 +1,188 @@
 # Copyright (c) 2025, gadallah and contributors
 # For license information, please see license.txt
 
+import os
+import re
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.utils import create_batch, flt, now
+
+from custody.custody.doctype.custody_balance.custody_balance import update_custody_balance
+from custody.custody.doctype.custody_summary.custody_summary import (
+    get_custody_totals,
+    update_custody_summary,
+)
+
+GROUPED_PRINT_FORMAT = "Custody Receipt Grouped"
+PRINT_CACHE_EXPIRY = 7 * 24 * 60 * 60
+
+
+def get_custody_key(doc):
+    """Everything on a receipt that balances and counters depend on"""
+    return (
+        doc.employee,
+        doc.company_name,
+        [(row.item_code, row.asset, row.purchase_receipt_item, flt(row.qty), flt(row.amount)) for row in doc.items],
+    )
+
+
+def get_print_cache_key(doc):
+    """
+    Cache key of a rendered PDF, tied to one version of a submitted receipt (any update changes
+    `modified`) and to the print format template, default letter head and language it is rendered with.
+    """
+    template = frappe.get_app_path(
+        "custody", "custody", "print_format", "custody_receipt_grouped", "custody_receipt_grouped.html"
+    )
+    versions = (
+        doc.modified,
+        frappe.db.get_value("Print Format", GROUPED_PRINT_FORMAT, "modified"),
+        os.path.getmtime(template) if os.path.exists(template) else None,
+        frappe.db.get_value("Letter Head", {"is_default": 1}, "modified"),
+        frappe.local.lang,
+    )
+    return f"custody_receipt_print::pdf::{doc.name}::{'::'.join(str(v) for v in versions)}"
+
+
+def compact_asset_names(assets):
+    """
+    Collapses consecutive asset names into ranges for printing,
+    e.g. ACC-ASS-2025-00001, -00002, -00003 -> "ACC-ASS-2025-00001 - 00003".
+    """
+    numbered, others = {}, []
+    for asset in sorted(set(assets)):
+        match = re.match(r"^(.*?)(\d+)$", asset)
+        if match:
+            numbered.setdefault(match.group(1), []).append(match.group(2))
+        else:
+            others.append(asset)
+
+    ranges = []
+    for prefix, numbers in numbered.items():
+        numbers.sort(key=int)
+        start = end = numbers[0]
+        for number in numbers[1:] + [None]:
+            if number is not None and int(number) == int(end) + 1:
+                end = number
+                continue
+            ranges.append(f"{prefix}{start}" if start == end else f"{prefix}{start} - {end}")
+            start = end = number
+
+    return ", ".join(ranges + others)
+
+
+def get_grouped_custody_items(doc):
+    """
+    Rows of a Custody Receipt grouped by item code, UOM and rate with quantity totals
+    and a compact asset list, for the grouped print format. Cached once submitted.
+    """
+    # the rows only depend on the receipt itself, not on template, letter head or language
+    key = f"custody_receipt_print::items::{doc.name}::{doc.modified}"
+    if doc.docstatus == 1:
+        cached = frappe.cache().get_value(key)
+        if cached is not None:
+            return cached
+
+    groups = {}
+    for row in doc.items:
+        group = groups.get((row.item_code, row.uom, flt(row.rate)))
+        if not group:
+            group = groups[(row.item_code, row.uom, flt(row.rate))] = frappe._dict(
+                item_code=row.item_code,
+                item_name=row.item_name,
+                uom=row.uom,
+                rate=flt(row.rate),
+                qty=0,
+                amount=0,
+                assets=[],
+            )
+        group.qty += flt(row.qty)
+        group.amount += flt(row.amount)
+        if row.asset:
+            group.assets.append(row.asset)
+
+    items = list(groups.values())
+    for idx, group in enumerate(items, 1):
+        group.idx = idx
+        group.assets = compact_asset_names(group.assets)
+
+    if doc.docstatus == 1:
+        frappe.cache().set_value(key, items, expires_in_sec=PRINT_CACHE_EXPIRY)
+
+    return items
+
 
 class CustodyReceipt(Document):
     def validate(self):
         self.validate_mandatory_fields()
+
+    def on_update(self):
+        if not self.docstatus.is_draft():
+            return
+
+        previous = self.get_doc_before_save()
+        if previous and (previous.employee, previous.company_name) == (self.employee, self.company_name):
+            return
+
+        if previous:
+            update_custody_summary(previous.employee, previous.company_name, drafts=-1)
+        update_custody_summary(self.employee, self.company_name, drafts=1)
+
+    def on_submit(self):
+        update_custody_balance(self, "issued_qty")
+        self.update_assets_custodian()
+
+        previous = self.get_doc_before_save()
+        if previous and previous.docstatus.is_draft():
+            update_custody_summary(previous.employee, previous.company_name, drafts=-1)
+        assets, value = get_custody_totals(self)
+        update_custody_summary(self.employee, self.company_name, assets=assets, value=value)
+
+    def on_cancel(self):
+        update_custody_balance(self, "issued_qty", factor=-1)
+        self.restore_assets_custodian()
+
+        assets, value = get_custody_totals(self)
+        update_custody_summary(self.employee, self.company_name, assets=-assets, value=-value)
+
+    def before_update_after_submit(self):
+        previous = self.get_doc_before_save()
+        if not previous or get_custody_key(previous) == get_custody_key(self):
+            return
+
+        if frappe.db.exists("Custody Return Item", {"custody_receipt": self.name, "docstatus": 1}):
+            frappe.throw(_("Cannot change the employee, company or items of Custody Receipt {0} because it has submitted Custody Returns").format(self.name))
+
+    def on_update_after_submit(self):
+        # employee, company and items are editable after submit, so move balances, counters and assets along
+        previous = self.get_doc_before_save()
+        if not previous or get_custody_key(previous) == get_custody_key(self):
+            return
+
+        update_custody_balance(previous, "issued_qty", factor=-1)
+        update_custody_balance(self, "issued_qty")
+
+        assets, value = get_custody_totals(previous)
+        update_custody_summary(previous.employee, previous.company_name, assets=-assets, value=-value)
+        assets, value = get_custody_totals(self)
+        update_custody_summary(self.employee, self.company_name, assets=assets, value=value)
+
+        employee_changed = previous.employee != self.employee
+        previous_assets = {row.name: row.asset for row in previous.items}
+        current_assets = {row.name: row.asset for row in self.items}
+        self.restore_assets_custodian(
+            [row for row in previous.items if employee_changed or current_assets.get(row.name) != row.asset],
+            employee=previous.employee,
+        )
+        self.update_assets_custodian(
+            [row for row in self.items if employee_changed or previous_assets.get(row.name) != row.asset]
+        )
+
+    def on_trash(self):
+        if self.docstatus.is_draft():
+            update_custody_summary(self.employee, self.company_name, drafts=-1)
     
     def validate_mandatory_fields(self):
         """Validate that required fields are set before submission"""
@@ -22,4 +197,133 @@ class CustodyReceipt(Document):
         
         # Additional validation for items if needed
         if not self.get('items') or len(self.items) == 0:
-            frappe.throw(_("Cannot submit Custody Receipt without any items"))
\ No newline at end of file
+            frappe.throw(_("Cannot submit Custody Receipt without any items"))
+
+    def get_assets(self):
+        return sorted({row.asset for row in self.items if row.asset})
+
+    def update_assets_custodian(self, rows=None):
+        """
+        Hands the assets of this receipt (or of the given rows) over to the employee, and to the
+        receipt's location if set. The previous custodian and location are kept on the rows so
+        cancel can restore them. Assets are updated with set-based statements, not one save each.
+        """
+        whole_receipt = rows is None
+        rows = [row for row in (self.items if whole_receipt else rows) if row.asset]
+        if not rows or not self.employee:
+            return
+
+        names = [row.name for row in rows]
+        for batch in create_batch(names, 1000):
+            frappe.db.sql(
+                """update `tabCustody Receipt Item` i
+                inner join `tabAsset` a on a.name = i.asset
+                set i.previous_custodian = a.custodian, i.previous_location = a.location
+                where i.name in %(rows)s""",
+                {"rows": tuple(batch)},
+            )
+
+        rows_by_name = {row.name: row for row in rows}
+        for previous in frappe.get_all(
+            "Custody Receipt Item",
+            filters={"name": ("in", names)},
+            fields=["name", "previous_custodian", "previous_location"],
+        ):
+            rows_by_name[previous.name].previous_custodian = previous.previous_custodian
+            rows_by_name[previous.name].previous_location = previous.previous_location
+
+        # Asset Movement resets custodian/location of its assets on submit, so it goes first
+        if self.create_asset_movement and whole_receipt:
+            self.make_asset_movement(sorted({row.asset for row in rows}))
+
+        for batch in create_batch(names, 1000):
+            frappe.db.sql(
+                """update `tabAsset` a
+                inner join `tabCustody Receipt Item` i on i.asset = a.name
+                set a.custodian = %(employee)s,
+                    a.location = coalesce(%(location)s, i.previous_location, a.location),
+                    a.modified = %(modified)s, a.modified_by = %(user)s
+                where i.name in %(rows)s""",
+                {
+                    "employee": self.employee,
+                    "location": self.location,
+                    "modified": now(),
+                    "user": frappe.session.user,
+                    "rows": tuple(batch),
+                },
+            )
+
+    def make_asset_movement(self, assets):
+        """
+        Records the hand-over as a single Asset Movement holding all assets of the receipt.
+        ERPNext only allows an Issue movement to target an employee, not a location, so a
+        location set on the receipt is applied to the assets but not recorded in the movement.
+        """
+        movement = frappe.new_doc("Asset Movement")
+        movement.company = self.company_name
+        movement.purpose = "Issue"
+        movement.transaction_date = now()
+        movement.reference_doctype = self.doctype
+        movement.reference_name = self.name
+
+        for asset in frappe.get_all(
+            "Asset",
+            filters={"name": ("in", assets)},
+            fields=["name", "location", "custodian"],
+            order_by="name",
+        ):
+            movement.append("assets", {
+                "asset": asset.name,
+                "source_location": asset.location,
+                "from_employee": asset.custodian,
+                "to_employee": self.employee,
+            })
+
+        movement.flags.ignore_permissions = True
+        movement.submit()
+        self.db_set("asset_movement", movement.name)
+
+    def restore_assets_custodian(self, rows=None, employee=None):
+        """
+        Gives the assets of this receipt (or of the given rows) back to their previous custodian
+        and location, skipping assets handed to someone other than `employee` since then.
+        """
+        rows = [row for row in (self.items if rows is None else rows) if row.asset]
+        employee = employee or self.employee
+        if not rows:
+            return
+
+        held = set(frappe.get_all(
+            "Asset",
+            filters={"name": ("in", list({row.asset for row in rows})), "custodian": employee},
+            pluck="name",
+        ))
+
+        if self.docstatus.is_cancelled() and self.asset_movement and frappe.db.get_value(
+            "Asset Movement", self.asset_movement, "docstatus"
+        ) == 1:
+            movement = frappe.get_doc("Asset Movement", self.asset_movement)
+            movement.flags.ignore_permissions = True
+            movement.cancel()
+
+        # one statement per distinct previous custodian and location, which are few
+        previous = {}
+        for row in rows:
+            if row.asset in held:
+                previous.setdefault((row.previous_custodian, row.previous_location), set()).add(row.asset)
+
+        for (custodian, location), assets in previous.items():
+            for batch in create_batch(sorted(assets), 1000):
+                frappe.db.sql(
+                    """update `tabAsset`
+                    set custodian = %(custodian)s, location = coalesce(%(location)s, location),
+                        modified = %(modified)s, modified_by = %(user)s
+                    where name in %(assets)s""",
+                    {
+                        "custodian": custodian,
+                        "location": location,
+                        "modified": now(),
+                        "user": frappe.session.user,
+                        "assets": tuple(batch),
+                    },
+                )
@@ -1,9 +1,216 @@
 # Copyright (c) 2025, gadallah and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, today
+
+from custody.custody.doctype.custody_receipt.custody_receipt import (
+	compact_asset_names,
+	get_grouped_custody_items,
+	get_print_cache_key,
+)
+
+TEST_COMPANY = "_Test Company"
+TEST_ITEM = "_Test Custody Item"
+TEST_LOCATION = "_Test Custody Location"
+
+
+def make_custody_receipt(employee, items=None, assets=None, **args):
+	"""items is a list of {"item_code", "qty"} dicts, assets a list of Asset names"""
+	args = frappe._dict(args)
+	rate = flt(args.rate or 100)
+
+	cr = frappe.new_doc("Custody Receipt")
+	cr.company_name = args.company or TEST_COMPANY
+	cr.employee = employee
+	cr.posting_date = args.posting_date or today()
+	cr.location = args.location
+	cr.create_asset_movement = args.create_asset_movement or 0
+
+	for asset in assets or []:
+		item_code = frappe.db.get_value("Asset", asset, "item_code")
+		cr.append("items", {
+			"item_code": item_code,
+			"item_name": item_code,
+			"qty": 1,
+			"asset": asset,
+			"rate": rate,
+			"amount": rate,
+		})
+
+	for item in items or []:
+		cr.append("items", {
+			"item_code": item["item_code"],
+			"item_name": item["item_code"],
+			"qty": item["qty"],
+			"uom": item.get("uom"),
+			"rate": item.get("rate", rate),
+			"amount": item.get("amount", flt(item.get("rate", rate)) * flt(item["qty"])),
+		})
+
+	if not args.do_not_save:
+		cr.insert()
+		if not args.do_not_submit:
+			cr.submit()
+
+	return cr
+
+
+def make_custody_assets(count=2):
+	"""Submitted assets without custodian, at the ERPNext "Test Location" """
+	from erpnext.assets.doctype.asset.test_asset import create_asset
+
+	if not frappe.db.exists("Location", TEST_LOCATION):
+		frappe.get_doc({"doctype": "Location", "location_name": TEST_LOCATION}).insert()
+
+	return [create_asset(item_code="Macbook Pro", location="Test Location", submit=1).name for _ in range(count)]
+
+
+def make_custody_test_data():
+	from erpnext.setup.doctype.employee.test_employee import make_employee
+	from erpnext.stock.doctype.item.test_item import make_item
+
+	make_item(TEST_ITEM, {"is_stock_item": 0})
+	return (
+		make_employee("custody_employee@example.com", company=TEST_COMPANY),
+		make_employee("custody_other_employee@example.com", company=TEST_COMPANY),
+	)
 
 
 class TestCustodyReceipt(FrappeTestCase):
-	pass
+	def setUp(self):
+		self.employee, self.other_employee = make_custody_test_data()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_asset_holders(self, assets):
+		return {
+			asset.name: (asset.custodian, asset.location)
+			for asset in frappe.get_all(
+				"Asset", filters={"name": ("in", assets)}, fields=["name", "custodian", "location"]
+			)
+		}
+
+	def test_grouped_custody_items(self):
+		cr = make_custody_receipt(
+			self.employee,
+			items=[
+				{"item_code": TEST_ITEM, "qty": 2, "rate": 10},
+				{"item_code": TEST_ITEM, "qty": 3, "rate": 10},
+				{"item_code": TEST_ITEM, "qty": 1, "rate": 20},
+			],
+		)
+		items = get_grouped_custody_items(cr)
+		self.assertEqual([(item.item_code, item.rate, item.qty, item.amount) for item in items], [
+			(TEST_ITEM, 10, 5, 50),
+			(TEST_ITEM, 20, 1, 20),
+		])
+
+		# a submitted version is served from cache, later changes bump `modified` and the key
+		cr.items[0].qty = 100
+		self.assertEqual(get_grouped_custody_items(cr), items)
+
+		# only the PDF depends on the language
+		key = get_print_cache_key(cr)
+		frappe.local.lang, lang = "ar", frappe.local.lang
+		try:
+			self.assertNotEqual(get_print_cache_key(cr), key)
+			self.assertEqual(get_grouped_custody_items(cr), items)
+		finally:
+			frappe.local.lang = lang
+
+	def test_assets_handed_over_and_restored(self):
+		assets = make_custody_assets()
+		cr = make_custody_receipt(self.employee, assets=assets, location=TEST_LOCATION)
+		self.assertEqual(cr.items[0].previous_location, "Test Location")
+		self.assertFalse(cr.items[0].previous_custodian)
+		self.assertEqual(
+			self.get_asset_holders(assets), {asset: (self.employee, TEST_LOCATION) for asset in assets}
+		)
+
+		cr.cancel()
+		self.assertEqual(self.get_asset_holders(assets), {asset: (None, "Test Location") for asset in assets})
+
+	def test_restore_skips_reassigned_assets(self):
+		assets = make_custody_assets()
+		cr = make_custody_receipt(self.employee, assets=assets)
+		frappe.db.set_value("Asset", assets[1], "custodian", self.other_employee)
+
+		cr.cancel()
+		self.assertEqual(
+			self.get_asset_holders(assets),
+			{assets[0]: (None, "Test Location"), assets[1]: (self.other_employee, "Test Location")},
+		)
+
+	def test_single_asset_movement(self):
+		assets = make_custody_assets()
+		cr = make_custody_receipt(self.employee, assets=assets, create_asset_movement=1)
+
+		movement = frappe.get_doc("Asset Movement", cr.asset_movement)
+		self.assertEqual(movement.purpose, "Issue")
+		self.assertEqual(sorted(row.asset for row in movement.assets), sorted(assets))
+		# without a receipt location, assets keep the location they had before the movement
+		self.assertEqual(
+			self.get_asset_holders(assets), {asset: (self.employee, "Test Location") for asset in assets}
+		)
+
+		cr.cancel()
+		self.assertEqual(frappe.db.get_value("Asset Movement", movement.name, "docstatus"), 2)
+		self.assertEqual(self.get_asset_holders(assets), {asset: (None, "Test Location") for asset in assets})
+
+	def test_return_restores_custodian(self):
+		from custody.custody.doctype.custody_return.test_custody_return import make_custody_return
+
+		assets = make_custody_assets(count=1)
+		cr = make_custody_receipt(self.employee, assets=assets, location=TEST_LOCATION)
+
+		ret = make_custody_return(cr)
+		self.assertEqual(self.get_asset_holders(assets), {assets[0]: (None, "Test Location")})
+
+		ret.cancel()
+		self.assertEqual(self.get_asset_holders(assets), {assets[0]: (self.employee, TEST_LOCATION)})
+
+	def test_compact_asset_names(self):
+		self.assertEqual(
+			compact_asset_names(["ACC-ASS-2025-00003", "ACC-ASS-2025-00001", "ACC-ASS-2025-00002", "ACC-ASS-2025-00005"]),
+			"ACC-ASS-2025-00001 - 00003, ACC-ASS-2025-00005",
+		)
+		self.assertEqual(compact_asset_names(["LAPTOP", "X-9", "X-10"]), "X-9 - 10, LAPTOP")
+		self.assertEqual(compact_asset_names([]), "")
+
+	def test_change_after_submit(self):
+		from custody.custody.doctype.custody_balance.custody_balance import get_outstanding_qty
+
+		assets = make_custody_assets()
+		cr = make_custody_receipt(self.employee, assets=assets[:1], items=[{"item_code": TEST_ITEM, "qty": 2}])
+
+		cr.employee = self.other_employee
+		cr.items[0].asset = assets[1]
+		cr.save()
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 0)
+		self.assertEqual(get_outstanding_qty(self.other_employee, TEST_ITEM), 2)
+		self.assertEqual(
+			self.get_asset_holders(assets),
+			{assets[0]: (None, "Test Location"), assets[1]: (self.other_employee, "Test Location")},
+		)
+
+		cr.cancel()
+		self.assertEqual(self.get_asset_holders(assets), {asset: (None, "Test Location") for asset in assets})
+
+	def test_change_after_return_is_rejected(self):
+		from custody.custody.doctype.custody_return.test_custody_return import make_custody_return
+
+		assets = make_custody_assets()
+		cr = make_custody_receipt(self.employee, assets=assets[:1], items=[{"item_code": TEST_ITEM, "qty": 2}])
+		make_custody_return(cr)
+
+		cr.reload()
+		cr.employee = self.other_employee
+		self.assertRaises(frappe.ValidationError, cr.save)
+
+		cr.reload()
+		cr.items[0].asset = assets[1]
+		self.assertRaises(frappe.ValidationError, cr.save)
+
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, gadallah and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Custody Return", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,180 @@
+# Copyright (c) 2026, gadallah and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import create_batch, flt, now
+
+from custody.custody.doctype.custody_balance.custody_balance import (
+    get_outstanding_map,
+    get_row_balance_name,
+    update_custody_balance,
+)
+from custody.custody.doctype.custody_summary.custody_summary import (
+    get_custody_totals,
+    update_custody_summary,
+)
+
+RECEIPT_ROW_FIELDS = ("item_code", "item_name", "asset", "purchase_receipt_item", "uom", "rate")
+
+
+def get_receipt_rows(rows, for_update=False):
+    """
+    Returns the Custody Receipt Items referenced by return rows, with their receipt's status, employee and company.
+    With for_update the rows stay locked until the transaction ends.
+    """
+    names = list({row.custody_receipt_item for row in rows if row.custody_receipt_item})
+    if not names:
+        return {}
+
+    receipt_rows = frappe.db.sql(
+        f"""select i.name, i.parent, i.item_code, i.item_name, i.asset, i.purchase_receipt_item,
+            i.uom, i.rate, i.amount, i.qty, i.returned_qty, p.docstatus, p.employee, p.company_name
+        from `tabCustody Receipt Item` i
+        inner join `tabCustody Receipt` p on p.name = i.parent
+        where i.parenttype = 'Custody Receipt' and i.name in %(names)s
+        {"for update" if for_update else ""}""",
+        {"names": tuple(names)},
+        as_dict=True,
+    )
+    return {row.name: row for row in receipt_rows}
+
+
+def update_receipt_returned_qty(doc, factor=1):
+    """Adds the returned quantities of a Custody Return to the Custody Receipt Items it points at"""
+    deltas = {}
+    for row in doc.items:
+        deltas[row.custody_receipt_item] = deltas.get(row.custody_receipt_item, 0) + flt(row.qty) * factor
+
+    for names in create_batch(sorted(deltas), 500):
+        case = " ".join(["when %s then %s"] * len(names))
+        frappe.db.sql(
+            f"""update `tabCustody Receipt Item`
+            set returned_qty = returned_qty + (case name {case} else 0 end)
+            where name in ({", ".join(["%s"] * len(names))})""",
+            [value for name in names for value in (name, deltas[name])] + names,
+        )
+
+
+class CustodyReturn(Document):
+    def validate(self):
+        self.validate_items()
+        self.validate_returnable_qty()
+        self.validate_outstanding_qty()
+
+    def on_submit(self):
+        update_receipt_returned_qty(self)
+        update_custody_balance(self, "returned_qty")
+        self.restore_returned_assets()
+
+        assets, value = get_custody_totals(self)
+        update_custody_summary(self.employee, self.company_name, assets=-assets, value=-value)
+
+    def on_cancel(self):
+        update_receipt_returned_qty(self, factor=-1)
+        update_custody_balance(self, "returned_qty", factor=-1)
+        self.reissue_returned_assets()
+
+        assets, value = get_custody_totals(self)
+        update_custody_summary(self.employee, self.company_name, assets=assets, value=value)
+
+    def validate_items(self):
+        """
+        Every row must point at a row of a submitted Custody Receipt of the same employee and company.
+        Item details are always taken from that receipt row, never from the client.
+        """
+        if not self.get('items'):
+            frappe.throw(_("Cannot save Custody Return without any items"))
+
+        # lock on submit so concurrent returns of the same rows are checked one after the other
+        self.receipt_rows = get_receipt_rows(self.items, for_update=self.docstatus.is_submitted())
+
+        for row in self.items:
+            source = self.receipt_rows.get(row.custody_receipt_item)
+            if not source or source.parent != row.custody_receipt:
+                frappe.throw(_("Row {0}: Custody Receipt Item {1} does not belong to Custody Receipt {2}").format(
+                    row.idx, row.custody_receipt_item, row.custody_receipt))
+
+            if source.docstatus != 1:
+                frappe.throw(_("Row {0}: Custody Receipt {1} is not submitted").format(row.idx, row.custody_receipt))
+
+            if source.employee != self.employee:
+                frappe.throw(_("Row {0}: Custody Receipt {1} was not issued to employee {2}").format(
+                    row.idx, row.custody_receipt, self.employee))
+
+            if source.company_name != self.company_name:
+                frappe.throw(_("Row {0}: Custody Receipt {1} belongs to company {2}, not {3}").format(
+                    row.idx, row.custody_receipt, source.company_name, self.company_name))
+
+            if flt(row.qty) <= 0:
+                frappe.throw(_("Row {0}: Returned Quantity must be greater than zero").format(row.idx))
+
+            for field in RECEIPT_ROW_FIELDS:
+                row.set(field, source.get(field))
+            # the share of the receipt row's amount, so a full return takes off exactly what was issued
+            row.amount = flt(source.amount) * flt(row.qty) / flt(source.qty) if flt(source.qty) else 0
+
+    def validate_returnable_qty(self):
+        """A receipt row cannot be returned beyond what it issued minus earlier returns"""
+        returned = {}
+        for row in self.items:
+            source = self.receipt_rows[row.custody_receipt_item]
+            returned[source.name] = returned.get(source.name, 0) + flt(row.qty)
+            returnable = flt(source.qty) - flt(source.returned_qty)
+            if returned[source.name] > returnable:
+                frappe.throw(_("Row {0}: Cannot return {1} of item {2}, only {3} is still returnable on Custody Receipt {4}").format(
+                    row.idx, returned[source.name], row.item_code, returnable, row.custody_receipt))
+
+    def validate_outstanding_qty(self):
+        """Returned quantities cannot exceed what is still in the employee's custody"""
+        outstanding = get_outstanding_map(self.employee, self.items, for_update=self.docstatus.is_submitted())
+        returned = {}
+        for row in self.items:
+            name = get_row_balance_name(self.employee, row)
+            returned[name] = returned.get(name, 0) + flt(row.qty)
+            if returned[name] > flt(outstanding.get(name)):
+                frappe.throw(_("Row {0}: Cannot return {1} of item {2}, only {3} is outstanding with employee {4}").format(
+                    row.idx, returned[name], row.item_code, flt(outstanding.get(name)), self.employee))
+
+    def get_asset_receipt_rows(self):
+        return sorted({row.custody_receipt_item for row in self.items if row.asset})
+
+    def restore_returned_assets(self):
+        """
+        Fully returned assets go back to the custodian and location they had before the receipt,
+        unless they have been handed to someone else in the meantime.
+        """
+        for batch in create_batch(self.get_asset_receipt_rows(), 1000):
+            frappe.db.sql(
+                """update `tabAsset` a
+                inner join `tabCustody Receipt Item` i on i.asset = a.name
+                set a.custodian = i.previous_custodian,
+                    a.location = coalesce(i.previous_location, a.location),
+                    a.modified = %(modified)s, a.modified_by = %(user)s
+                where i.name in %(rows)s and i.returned_qty >= i.qty and a.custodian = %(employee)s""",
+                {
+                    "employee": self.employee,
+                    "modified": now(),
+                    "user": frappe.session.user,
+                    "rows": tuple(batch),
+                },
+            )
+
+    def reissue_returned_assets(self):
+        """Hands assets back to the receipt's employee when cancelling the return leaves them outstanding"""
+        for batch in create_batch(self.get_asset_receipt_rows(), 1000):
+            frappe.db.sql(
+                """update `tabAsset` a
+                inner join `tabCustody Receipt Item` i on i.asset = a.name
+                inner join `tabCustody Receipt` p on p.name = i.parent
+                set a.custodian = p.employee,
+                    a.location = coalesce(p.location, a.location),
+                    a.modified = %(modified)s, a.modified_by = %(user)s
+                where i.name in %(rows)s and i.returned_qty < i.qty and a.custodian <=> i.previous_custodian""",
+                {
+                    "modified": now(),
+                    "user": frappe.session.user,
+                    "rows": tuple(batch),
+                },
+            )
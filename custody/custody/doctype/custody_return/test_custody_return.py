@@ -0,0 +1,111 @@
+# Copyright (c) 2026, gadallah and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custody.custody.api.custody_receipt import create_custody_return_from_receipt
+from custody.custody.doctype.custody_balance.custody_balance import get_outstanding_qty
+from custody.custody.doctype.custody_summary.custody_summary import get_summary_name
+from custody.custody.doctype.custody_receipt.test_custody_receipt import (
+	TEST_COMPANY,
+	TEST_ITEM,
+	make_custody_receipt,
+	make_custody_test_data,
+)
+
+
+def make_custody_return(receipt, qty=None, do_not_submit=False):
+	ret = frappe.get_doc("Custody Return", create_custody_return_from_receipt(receipt.name))
+	if qty is not None:
+		ret.items[0].qty = qty
+		ret.save()
+	if not do_not_submit:
+		ret.submit()
+	return ret
+
+
+class TestCustodyReturn(FrappeTestCase):
+	def setUp(self):
+		self.employee, self.other_employee = make_custody_test_data()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_partial_return_from_receipt(self):
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 5}])
+
+		ret = make_custody_return(cr, qty=2)
+		self.assertEqual(ret.items[0].custody_receipt_item, cr.items[0].name)
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 3)
+		self.assertEqual(frappe.db.get_value("Custody Receipt Item", cr.items[0].name, "returned_qty"), 2)
+
+		ret = make_custody_return(cr, do_not_submit=True)
+		self.assertEqual(ret.items[0].qty, 3)
+
+	def test_return_is_capped_per_receipt_row(self):
+		first = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 2}])
+		make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 3}])
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 5)
+
+		# the employee still holds 5, but only 2 were issued on the first receipt
+		ret = make_custody_return(first, do_not_submit=True)
+		ret.items[0].qty = 3
+		self.assertRaises(frappe.ValidationError, ret.save)
+
+		make_custody_return(first)
+		self.assertRaises(frappe.ValidationError, create_custody_return_from_receipt, first.name)
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 3)
+
+	def test_row_details_are_taken_from_receipt(self):
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1, "rate": 50}])
+
+		ret = make_custody_return(cr, do_not_submit=True)
+		ret.items[0].rate = 1000
+		ret.items[0].item_name = "Tampered"
+		ret.save()
+		self.assertEqual(ret.items[0].rate, 50)
+		self.assertEqual(ret.items[0].amount, 50)
+		self.assertEqual(ret.items[0].item_name, TEST_ITEM)
+
+		other = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1}])
+		ret.items[0].custody_receipt = other.name
+		self.assertRaises(frappe.ValidationError, ret.save)
+
+	def test_return_amount_follows_receipt_amount(self):
+		# rows added by hand keep amount 0 whatever their rate
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 2, "rate": 50, "amount": 0}])
+		summary = get_summary_name(self.employee, TEST_COMPANY)
+		value = frappe.db.get_value("Custody Summary", summary, "custody_value")
+
+		ret = make_custody_return(cr, qty=1)
+		self.assertEqual(ret.items[0].amount, 0)
+		self.assertEqual(frappe.db.get_value("Custody Summary", summary, "custody_value"), value)
+
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 4, "rate": 50, "amount": 100}])
+		ret = make_custody_return(cr, qty=1)
+		self.assertEqual(ret.items[0].amount, 25)
+
+	def test_return_of_other_employees_receipt(self):
+		cr = make_custody_receipt(self.other_employee, items=[{"item_code": TEST_ITEM, "qty": 1}])
+
+		ret = make_custody_return(cr, do_not_submit=True)
+		ret.employee = self.employee
+		self.assertRaises(frappe.ValidationError, ret.save)
+
+	def test_return_of_other_companys_receipt(self):
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1}])
+
+		ret = make_custody_return(cr, do_not_submit=True)
+		ret.company_name = None
+		self.assertRaises(frappe.ValidationError, ret.save)
+
+	def test_cancel_restores_outstanding_qty(self):
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 4}])
+
+		ret = make_custody_return(cr)
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 0)
+
+		ret.cancel()
+		self.assertEqual(get_outstanding_qty(self.employee, TEST_ITEM), 4)
+		self.assertEqual(frappe.db.get_value("Custody Receipt Item", cr.items[0].name, "returned_qty"), 0)
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, gadallah and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, flt
+
+from custody.utils import get_key_name, replace_all, upsert_counters
+
+SUMMARY_FIELDS = [
+    "name", "employee", "employee_name", "company_name", "assets_in_custody",
+    "custody_value", "pending_drafts",
+]
+
+
+class CustodySummary(Document):
+    pass
+
+
+def get_summary_name(employee, company):
+    """Deterministic name of the counters row for an employee and company"""
+    return get_key_name(employee, company)
+
+
+def get_custody_totals(doc):
+    """Returns (number of assets, value) carried by a Custody Receipt or Custody Return"""
+    assets = len({row.asset for row in doc.get("items") if row.asset})
+    value = sum(flt(row.amount) for row in doc.get("items"))
+    return assets, value
+
+
+def update_custody_summary(employee, company, assets=0, value=0, drafts=0):
+    """Adds the given deltas to the counters of an employee and company"""
+    if not (assets or value or drafts):
+        return
+
+    employee_name = frappe.db.get_value("Employee", employee, "employee_name") if employee else None
+    upsert_counters(
+        "Custody Summary",
+        SUMMARY_FIELDS,
+        [(get_summary_name(employee, company), employee or None, employee_name, company or None, assets, value, drafts)],
+        ("assets_in_custody", "custody_value", "pending_drafts"),
+    )
+
+
+def rebuild_custody_summary():
+    """Recomputes all counters from Custody Receipts and Custody Returns"""
+    summary = {}
+
+    def add(row, factor=1):
+        name = get_summary_name(row.employee, row.company_name)
+        counters = summary.setdefault(name, frappe._dict(
+            employee=row.employee, employee_name=row.employee_name, company_name=row.company_name,
+            assets_in_custody=0, custody_value=0, pending_drafts=0,
+        ))
+        counters.assets_in_custody += factor * cint(row.assets)
+        counters.custody_value += factor * flt(row.value)
+        counters.pending_drafts += cint(row.drafts)
+
+    for doctype, factor in (("Custody Receipt", 1), ("Custody Return", -1)):
+        rows = frappe.db.sql(
+            f"""select employee, max(employee_name) as employee_name, company_name,
+                sum(assets) as assets, sum(value) as value
+            from (
+                select p.name, p.employee, p.employee_name, p.company_name,
+                    count(distinct i.asset) as assets, sum(i.amount) as value
+                from `tab{doctype}` p
+                inner join `tab{doctype} Item` i on i.parent = p.name and i.parenttype = %s
+                where p.docstatus = 1
+                group by p.name, p.employee, p.employee_name, p.company_name
+            ) t
+            group by employee, company_name""",
+            doctype,
+            as_dict=True,
+        )
+        for row in rows:
+            add(row, factor)
+
+    for row in frappe.db.sql(
+        """select employee, max(employee_name) as employee_name, company_name, count(*) as drafts
+        from `tabCustody Receipt`
+        where docstatus = 0
+        group by employee, company_name""",
+        as_dict=True,
+    ):
+        add(row)
+
+    replace_all("Custody Summary", SUMMARY_FIELDS, [
+        (name, c.employee, c.employee_name, c.company_name, c.assets_in_custody, c.custody_value, c.pending_drafts)
+        for name, c in summary.items()
+    ])
@@ -0,0 +1,67 @@
+# Copyright (c) 2026, gadallah and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custody.custody.doctype.custody_receipt.test_custody_receipt import (
+	TEST_COMPANY,
+	TEST_ITEM,
+	make_custody_receipt,
+	make_custody_test_data,
+)
+from custody.custody.doctype.custody_summary.custody_summary import (
+	get_summary_name,
+	rebuild_custody_summary,
+	update_custody_summary,
+)
+
+
+class TestCustodySummary(FrappeTestCase):
+	def setUp(self):
+		self.employee, self.other_employee = make_custody_test_data()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_counters(self, employee):
+		return tuple(frappe.db.get_value(
+			"Custody Summary",
+			get_summary_name(employee, TEST_COMPANY),
+			["assets_in_custody", "custody_value", "pending_drafts"],
+		) or (0, 0, 0))
+
+	def test_incremental_update(self):
+		update_custody_summary(self.employee, TEST_COMPANY, drafts=1)
+		update_custody_summary(self.employee, TEST_COMPANY, assets=3, value=300, drafts=-1)
+		update_custody_summary(self.employee, TEST_COMPANY, assets=-1, value=-100)
+		self.assertEqual(self.get_counters(self.employee), (2, 200, 0))
+
+	def test_receipt_transitions(self):
+		cr = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 2, "rate": 50}], do_not_submit=True)
+		self.assertEqual(self.get_counters(self.employee), (0, 0, 1))
+
+		# moving a draft to another employee moves its draft count along
+		cr.employee = self.other_employee
+		cr.save()
+		self.assertEqual(self.get_counters(self.employee), (0, 0, 0))
+		self.assertEqual(self.get_counters(self.other_employee), (0, 0, 1))
+
+		cr.submit()
+		self.assertEqual(self.get_counters(self.other_employee), (0, 100, 0))
+
+		cr.cancel()
+		self.assertEqual(self.get_counters(self.other_employee), (0, 0, 0))
+
+		draft = make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1}], do_not_submit=True)
+		self.assertEqual(self.get_counters(self.employee), (0, 0, 1))
+		draft.delete()
+		self.assertEqual(self.get_counters(self.employee), (0, 0, 0))
+
+	def test_rebuild(self):
+		make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1, "rate": 70}])
+		make_custody_receipt(self.employee, items=[{"item_code": TEST_ITEM, "qty": 1}], do_not_submit=True)
+		expected = self.get_counters(self.employee)
+
+		rebuild_custody_summary()
+		self.assertEqual(self.get_counters(self.employee), expected)
@@ -52,6 +52,7 @@ app_license = "mit"
 doctype_js = {
     "Purchase Receipt": "public/js/purchase_receipt_client.js",
     "Asset": "public/js/asset_client.js",
+    "Employee": "public/js/employee_client.js",
     "Custody Receipt": "public/js/custody_receipt_client.js"
 }
 
@@ -86,6 +87,12 @@ doctype_js = {
 # 	"filters": "custody.utils.jinja_filters"
 # }
 
+jinja = {
+    "methods": [
+        "custody.custody.doctype.custody_receipt.custody_receipt.get_grouped_custody_items"
+    ]
+}
+
 # Installation
 # ------------
 
@@ -0,0 +1,5 @@
+from custody.custody.doctype.custody_balance.custody_balance import rebuild_custody_balance
+
+
+def execute():
+    rebuild_custody_balance()
@@ -0,0 +1,5 @@
+from custody.custody.doctype.custody_summary.custody_summary import rebuild_custody_summary
+
+
+def execute():
+    rebuild_custody_summary()
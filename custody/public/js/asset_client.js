@@ -13,5 +13,20 @@ frappe.ui.form.on('Asset', {
                 }
             });
         }, __('Create'));
+
+        if (!frm.is_new()) {
+            frappe.call({
+                method: 'custody.custody.api.custody_dashboard.get_asset_custody',
+                args: { asset: frm.doc.name },
+                callback: (r) => {
+                    (r && r.message || []).forEach((row) => {
+                        frm.dashboard.add_indicator(
+                            __('In Custody of {0}', [row.employee_name || row.employee]),
+                            'blue'
+                        );
+                    });
+                }
+            });
+        }
     }
 }); 
\ No newline at end of file
@@ -6,6 +6,28 @@ frappe.ui.form.on('Custody Receipt', {
                 add_asset_item(frm);
             }, __('Add'));
         }
+
+        if (frm.doc.docstatus === 1) {
+            frm.add_custom_button(__('Custody Return'), () => {
+                frappe.call({
+                    method: 'custody.custody.api.custody_receipt.create_custody_return_from_receipt',
+                    args: { source_name: frm.doc.name },
+                    freeze: true,
+                    callback: (r) => {
+                        if (r && r.message) {
+                            frappe.set_route('Form', 'Custody Return', r.message);
+                        }
+                    }
+                });
+            }, __('Create'));
+
+            frm.add_custom_button(__('Grouped PDF'), () => {
+                window.open(
+                    '/api/method/custody.custody.api.custody_receipt.download_grouped_custody_receipt_pdf?name='
+                    + encodeURIComponent(frm.doc.name)
+                );
+            }, __('Print'));
+        }
     },
     
     employee(frm) {
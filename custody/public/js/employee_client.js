@@ -0,0 +1,33 @@
+frappe.ui.form.on('Employee', {
+    refresh(frm) {
+        if (frm.is_new()) {
+            return;
+        }
+
+        // Counters are precomputed in Custody Summary, so this stays cheap on every load
+        frappe.call({
+            method: 'custody.custody.api.custody_dashboard.get_employee_custody_summary',
+            args: { employee: frm.doc.name },
+            callback: (r) => {
+                if (!r || !r.message) {
+                    return;
+                }
+                let summary = r.message;
+                frm.dashboard.add_indicator(
+                    __('Assets in Custody: {0}', [summary.assets_in_custody]),
+                    summary.assets_in_custody ? 'blue' : 'gray'
+                );
+                frm.dashboard.add_indicator(
+                    __('Custody Value: {0}', [format_currency(summary.custody_value)]),
+                    'blue'
+                );
+                if (summary.pending_drafts) {
+                    frm.dashboard.add_indicator(
+                        __('Pending Custody Drafts: {0}', [summary.pending_drafts]),
+                        'orange'
+                    );
+                }
+            }
+        });
+    }
+});
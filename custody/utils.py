@@ -0,0 +1,45 @@
+import hashlib
+
+import frappe
+from frappe.utils import create_batch, now
+
+STANDARD_FIELDS = ("owner", "modified_by", "creation", "modified")
+
+
+def get_key_name(*parts):
+    """Deterministic document name for a composite key, so lookups by that key are a primary key read"""
+    key = "::".join(part or "" for part in parts)
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def with_standard_values(rows):
+    timestamp, user = now(), frappe.session.user
+    return [(*row, user, user, timestamp, timestamp) for row in rows]
+
+
+def upsert_counters(doctype, fields, rows, counters):
+    """
+    Inserts rows (tuples matching `fields`, starting with name) into a counters table.
+    When a name already exists its `counters` are incremented instead. Each batch is a single
+    upsert, so concurrent documents creating the same row cannot collide.
+    """
+    fields = [*fields, *STANDARD_FIELDS]
+    columns = ", ".join(f"`{field}`" for field in fields)
+    placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    increments = ", ".join(f"`{counter}` = `{counter}` + values(`{counter}`)" for counter in counters)
+
+    for batch in create_batch(with_standard_values(rows), 500):
+        frappe.db.sql(
+            f"""insert into `tab{doctype}` ({columns})
+            values {", ".join([placeholders] * len(batch))}
+            on duplicate key update {increments},
+                modified = values(modified), modified_by = values(modified_by)""",
+            [value for row in batch for value in row],
+        )
+
+
+def replace_all(doctype, fields, rows):
+    """Replaces the whole content of a counters table, for the rebuild functions"""
+    frappe.db.delete(doctype)
+    if rows:
+        frappe.db.bulk_insert(doctype, [*fields, *STANDARD_FIELDS], with_standard_values(rows))